@@ -3,9 +3,10 @@ import json
 import csv
 import os
 import re
-from collections import Counter
+from collections import Counter, defaultdict
 from datetime import datetime
-from urllib.parse import urljoin
+from functools import lru_cache
+from itertools import islice
 
 from playwright.async_api import async_playwright
 
@@ -20,36 +21,73 @@ except ImportError:
 # Utility
 # ----------------------------------------------------------
 
-def normalize(s: str) -> str:
+_STRIP_TABLE = str.maketrans("", "", "\u200b\u200e\u200f\u202a\u202b\u202c")
+_WS_RE = re.compile(r"\s+")
+_SLUG_SCHEME_RE = re.compile(r"^https?://")
+_SLUG_NONALNUM_RE = re.compile(r"[^A-Za-z0-9]+")
+_HTML_TRANS = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def _normalize(s: str) -> str:
     if not s:
         return ""
-    for ch in ["\u200b", "\u200e", "\u200f", "\u202a", "\u202b", "\u202c"]:
-        s = s.replace(ch, "")
-    return " ".join(s.split()).strip()
+    s = s.translate(_STRIP_TABLE)
+    return _WS_RE.sub(" ", s).strip()
 
 
-def normalize_lower(s: str) -> str:
-    return normalize(s).lower()
+# Author and class name strings repeat across most blocks of a feed, so the
+# public helpers are memoized; one-off blobs go through _normalize directly.
+@lru_cache(maxsize=16384)
+def normalize(s: str) -> str:
+    return _normalize(s)
+
+
+@lru_cache(maxsize=8192)
+def _html_escape_cached(text: str) -> str:
+    return text.translate(_HTML_TRANS)
 
 
 def html_escape(text: str) -> str:
+    # Authors, hrefs and image URLs repeat across cards: memoize them
     if text is None:
         return ""
-    return (
-        text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-    )
+    return _html_escape_cached(text)
+
+
+def _escape_text(text: str) -> str:
+    # Search blobs, snippets and class names are mostly unique and can be
+    # large: escape them directly rather than filling the cache with them
+    if not text:
+        return ""
+    return text.translate(_HTML_TRANS)
 
 
+@lru_cache(maxsize=512)
 def slugify_url(url: str) -> str:
     url = url.strip()
-    url = re.sub(r"^https?://", "", url)
-    url = re.sub(r"[^A-Za-z0-9]+", "_", url)
-    url = re.sub(r"_+", "_", url).strip("_")
+    url = _SLUG_SCHEME_RE.sub("", url)
+    url = _SLUG_NONALNUM_RE.sub("_", url).strip("_")
     return url or "page"
 
 
+def _iter_search_parts(b, primary, links, images):
+    """Yield every string that goes into a block's search blob."""
+    yield b.get("text") or ""
+    yield primary
+    yield from b.get("authorCandidates") or []
+    yield b.get("className") or ""
+    yield b.get("role") or ""
+    yield from b.get("timestampCandidates") or []
+    for lk in links:
+        yield lk["text"]
+    for lk in links:
+        yield lk["href"]
+    for im in images:
+        yield im["src"]
+    for im in images:
+        yield im["alt"]
+
+
 # ----------------------------------------------------------
 # DOM Extraction JS
 # ----------------------------------------------------------
@@ -69,6 +107,11 @@ JS_EXTRACT_BLOCKS = r"""
         return res;
     }
 
+    // Resolve a URL against the document, as the browser does for a.href
+    function absUrl(u) {
+        try { return new URL(u, document.baseURI).href; } catch (e) { return u; }
+    }
+
     let candidates = Array.from(document.querySelectorAll(
         [
             "article",
@@ -152,7 +195,7 @@ JS_EXTRACT_BLOCKS = r"""
                 const href = (a.getAttribute("href") || "").trim();
                 if (!href) continue;
                 const text = (a.innerText || "").trim();
-                links.push({ href, text });
+                links.push({ href: a.href || href, text });
                 if (links.length >= 30) break;
             }
         } catch (e) {}
@@ -161,11 +204,20 @@ JS_EXTRACT_BLOCKS = r"""
         try {
             const imgEls = el.querySelectorAll("img");
             for (const img of imgEls) {
-                let src = (img.getAttribute("src") || img.getAttribute("data-src") || "").trim();
-                const srcset = (img.getAttribute("srcset") || "").trim();
+                // Best URL: what the browser loaded, then src/data-src,
+                // then the last (largest) srcset candidate
+                const rawSrc = (img.getAttribute("src") || img.getAttribute("data-src") || "").trim();
+                let src = img.currentSrc || (rawSrc ? absUrl(rawSrc) : "");
+                if (!src) {
+                    const parts = (img.getAttribute("srcset") || "")
+                        .split(",")
+                        .map(p => p.trim().split(/\s+/)[0])
+                        .filter(Boolean);
+                    if (parts.length) src = absUrl(parts[parts.length - 1]);
+                }
+                if (!src) continue;
                 const alt = (img.getAttribute("alt") || "").trim();
-                if (!src && !srcset) continue;
-                images.push({ src, srcset, alt });
+                images.push({ src, alt });
                 if (images.length >= 30) break;
             }
         } catch (e) {}
@@ -196,14 +248,36 @@ JS_EXTRACT_BLOCKS = r"""
 """
 
 
+# ----------------------------------------------------------
+# Report templates
+# ----------------------------------------------------------
+
+# Opening of every block card; identical for all blocks, filled with %.
+_CARD_TPL = (
+    "<div class='block-card' data-search='%s'>\n"
+    "<div class='block-header'><div><strong>Post %d</strong></div>"
+    "<div class='block-meta'>len=%d</div></div>\n"
+)
+
+
 # ----------------------------------------------------------
 # Auto-scroll
 # ----------------------------------------------------------
 
+# The whole scroll/settle loop runs in the browser: one CDP round-trip
+# instead of two per step.
+JS_AUTO_SCROLL = r"""
+async ({ steps, delayMs }) => {
+    for (let i = 0; i < steps; i++) {
+        window.scrollBy(0, 2500);
+        await new Promise(r => setTimeout(r, delayMs));
+    }
+}
+"""
+
+
 async def auto_scroll(page, steps, delay):
-    for _ in range(steps):
-        await page.mouse.wheel(0, 2500)
-        await page.wait_for_timeout(delay * 1000)
+    await page.evaluate(JS_AUTO_SCROLL, {"steps": steps, "delayMs": int(delay * 1000)})
 
 
 # ----------------------------------------------------------
@@ -247,13 +321,19 @@ async def main():
         raw_blocks = await page.evaluate(JS_EXTRACT_BLOCKS)
         print("Found", len(raw_blocks), "blocks.")
 
-        # Filtering
-        filtered = []
-        for b in raw_blocks:
-            text = b.get("text") or ""
-            if text_filter and text_filter not in normalize_lower(text):
-                continue
-            filtered.append(b)
+        # Filtering: one compiled, case-insensitive pattern instead of
+        # lowercasing + normalizing every block's text (zero-width and bidi
+        # marks are still stripped so they can't split a word)
+        if text_filter:
+            search = re.compile(
+                r"\s+".join(map(re.escape, text_filter.split())), re.IGNORECASE
+            ).search
+            filtered = [
+                b for b in raw_blocks
+                if search((b.get("text") or "").translate(_STRIP_TABLE))
+            ]
+        else:
+            filtered = raw_blocks
 
         print("Keeping", len(filtered), "blocks.")
 
@@ -267,65 +347,32 @@ async def main():
             primary = authors[0] if authors else ""
             primary = normalize(primary)
             nb["primaryAuthor"] = primary
+            nb["_authorLower"] = primary.lower()
 
             if primary:
                 authors_set.add(primary)
 
             # Normalize links
             new_links = []
-            link_texts = []
-            link_hrefs = []
-
             for lk in b.get("links") or []:
-                href = lk.get("href") or ""
-                abs_href = urljoin(page_url, href)
-                text = lk.get("text") or ""
-                link_texts.append(text)
-                link_hrefs.append(abs_href)
-                new_links.append({"href": abs_href, "text": text})
+                new_links.append({"href": lk.get("href") or "", "text": lk.get("text") or ""})
 
             nb["links"] = new_links
 
             # Normalize images
             new_imgs = []
-            image_urls = []
-            image_alts = []
-
             for im in b.get("images") or []:
                 src = im.get("src") or ""
-                srcset = im.get("srcset") or ""
-                alt = im.get("alt") or ""
-
-                if not src and srcset:
-                    parts = [p.split()[0] for p in srcset.split(",") if p.strip()]
-                    if parts:
-                        src = parts[-1]
-
                 if not src:
                     continue
-
-                abs_src = urljoin(page_url, src)
-                new_imgs.append({"src": abs_src, "alt": alt})
-                image_urls.append(abs_src)
-                image_alts.append(alt)
+                new_imgs.append({"src": src, "alt": im.get("alt") or ""})
 
             nb["images"] = new_imgs
 
             # SEARCH BLOB
-            parts = [
-                b.get("text") or "",
-                b.get("snippet") or "",
-                primary,
-                " ".join(authors),
-                b.get("className") or "",
-                b.get("role") or "",
-                " ".join(b.get("timestampCandidates") or []),
-                " ".join(link_texts),
-                " ".join(link_hrefs),
-                " ".join(image_urls),
-                " ".join(image_alts),
-            ]
-            nb["searchBlob"] = normalize_lower(" ".join(parts))
+            nb["searchBlob"] = _normalize(
+                " ".join(filter(None, _iter_search_parts(b, primary, new_links, new_imgs)))
+            ).lower()
 
             normalized.append(nb)
 
@@ -335,17 +382,24 @@ async def main():
         html_path = os.path.join("reports", html_name)
 
         # Group by author
-        groups = {}
+        groups = defaultdict(list)
+        author_lower = {}
         for b in normalized:
             a = b.get("primaryAuthor") or "Unknown Author"
-            groups.setdefault(a, []).append(b)
+            groups[a].append(b)
+            if a not in author_lower:
+                author_lower[a] = b["_authorLower"] or "unknown author"
 
-        sorted_authors = sorted(groups.keys(), key=lambda x: x.lower())
+        sorted_authors = sorted(groups, key=author_lower.get)
 
-        html = []
-        html.append("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Report</title>")
+        # Write fragments straight to disk instead of staging the whole
+        # document in a list and joining it at the end
+        with open(html_path, "w", encoding="utf-8") as f:
+            w = f.write
+
+            w("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Report</title>\n")
 
-        html.append("""
+            w("""
 <style>
 body {
     background:#0d1117;
@@ -403,8 +457,8 @@ input[type="text"], select {
 </style>
 """)
 
-        # JS
-        html.append("""
+            # JS
+            w("""
 <script>
 function applyFilters(){
     const textQ = document.getElementById('flt_text').value.toLowerCase();
@@ -441,85 +495,79 @@ function toggleGroup(id){
 </script>
 """)
 
-        html.append("</head><body>")
-
-        # Header
-        html.append("<h1>Generic Page Analyzer Report</h1>")
-        html.append(f"<div class='meta-small'><strong>Url:</strong> {html_escape(page_url)}</div>")
-        html.append(f"<div class='meta-small'><strong>Generated:</strong> {html_escape(gen_label)}</div>")
-
-        # Controls
-        html.append("<div class='controls'>")
-        html.append("<input id='flt_text' type='text' placeholder='Search text...' onkeyup='applyFilters()'>")
-        html.append("<select id='flt_author' onchange='applyFilters()'>")
-        html.append("<option value='ALL'>All authors</option>")
-        for a in sorted_authors:
-            html.append(f"<option value='{html_escape(a)}'>{html_escape(a)}</option>")
-        html.append("</select></div>")
-
-        # Groups
-        html.append("<h2>Posts by Author</h2>")
-
-        gid = 0
-        for author in sorted_authors:
-            posts = groups[author]
-            gid += 1
-            group_id = f"group_{gid}"
-
-            html.append(
-                f"<div class='author-group' data-author='{html_escape(author)}'>"
-                f"<div class='author-header' onclick=\"toggleGroup('{group_id}')\">"
-                f"{html_escape(author)} ({len(posts)} posts)</div>"
-                f"<div class='author-body' id='{group_id}'>"
-            )
-
-            for b in posts:
-                idx = b["index"]
-                snippet = b["snippet"]
-                cls = b["className"]
-                ts = b.get("timestampCandidates") or []
-                links = b.get("links") or []
-                images = b.get("images") or []
-
-                html.append(
-                    f"<div class='block-card' data-search='{html_escape(b['searchBlob'])}'>"
+            w("</head><body>\n")
+
+            # Header
+            w("<h1>Generic Page Analyzer Report</h1>\n")
+            w(f"<div class='meta-small'><strong>Url:</strong> {_escape_text(page_url)}</div>\n")
+            w(f"<div class='meta-small'><strong>Generated:</strong> {_escape_text(gen_label)}</div>\n")
+
+            # Controls
+            w("<div class='controls'>\n")
+            w("<input id='flt_text' type='text' placeholder='Search text...' onkeyup='applyFilters()'>\n")
+            w("<select id='flt_author' onchange='applyFilters()'>\n")
+            w("<option value='ALL'>All authors</option>\n")
+            for a in sorted_authors:
+                w(f"<option value='{html_escape(a)}'>{html_escape(a)}</option>\n")
+            w("</select></div>\n")
+
+            # Groups
+            w("<h2>Posts by Author</h2>\n")
+
+            gid = 0
+            for author in sorted_authors:
+                posts = groups[author]
+                gid += 1
+                group_id = f"group_{gid}"
+
+                w(
+                    f"<div class='author-group' data-author='{html_escape(author)}'>"
+                    f"<div class='author-header' onclick=\"toggleGroup('{group_id}')\">"
+                    f"{html_escape(author)} ({len(posts)} posts)</div>"
+                    f"<div class='author-body' id='{group_id}'>\n"
                 )
-                html.append(f"<div class='block-header'><div><strong>Post {idx}</strong></div><div class='block-meta'>len={b['textLength']}</div></div>")
 
-                if cls:
-                    html.append(f"<div class='technical'>class={html_escape(cls[:100])}</div>")
+                for b in posts:
+                    idx = b["index"]
+                    snippet = b["snippet"]
+                    cls = b["className"]
+                    ts = b.get("timestampCandidates") or []
+                    links = b.get("links") or []
+                    images = b.get("images") or []
 
-                if ts:
-                    html.append("<div class='technical'>Timestamps: " +
-                                ", ".join(html_escape(t) for t in ts) + "</div>")
+                    w(_CARD_TPL % (_escape_text(b["searchBlob"]), idx, b["textLength"]))
 
-                html.append(f"<div class='snippet'>{html_escape(snippet)}</div>")
+                    if cls:
+                        w(f"<div class='technical'>class={_escape_text(cls[:100])}</div>\n")
 
-                if links:
-                    html.append("<div class='links'><strong>Links:</strong>")
-                    for lk in links[:8]:
-                        html.append(
-                            f"<div>- <a href='{html_escape(lk['href'])}' target='_blank'>{html_escape(lk['text'] or lk['href'])}</a></div>"
-                        )
-                    html.append("</div>")
+                    if ts:
+                        w("<div class='technical'>Timestamps: " +
+                          ", ".join(html_escape(t) for t in ts) + "</div>\n")
 
-                if images:
-                    html.append("<div class='images'><strong>Images:</strong><br>")
-                    for im in images[:6]:
-                        html.append(
-                            f"<a href='{html_escape(im['src'])}' target='_blank'>"
-                            f"<img class='thumb-img' src='{html_escape(im['src'])}'></a>"
-                        )
-                    html.append("</div>")
+                    w(f"<div class='snippet'>{_escape_text(snippet)}</div>\n")
 
-                html.append("</div>")  # block-card
+                    if links:
+                        w("<div class='links'><strong>Links:</strong>\n")
+                        for lk in islice(links, 8):
+                            w(
+                                f"<div>- <a href='{html_escape(lk['href'])}' target='_blank'>{html_escape(lk['text'] or lk['href'])}</a></div>\n"
+                            )
+                        w("</div>\n")
 
-            html.append("</div></div>")  # author-body + group
+                    if images:
+                        w("<div class='images'><strong>Images:</strong><br>\n")
+                        for im in islice(images, 6):
+                            w(
+                                f"<a href='{html_escape(im['src'])}' target='_blank'>"
+                                f"<img class='thumb-img' src='{html_escape(im['src'])}'></a>\n"
+                            )
+                        w("</div>\n")
 
-        html.append("</body></html>")
+                    w("</div>\n")  # block-card
 
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(html))
+                w("</div></div>\n")  # author-body + group
+
+            w("</body></html>\n")
 
         print("Saved HTML:", html_path)
 
@@ -4,14 +4,20 @@
 # This is the low-level extractor: no Facebook-specific logic.
 
 import asyncio
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # ----------------------------------------------------------
-# JS snippet used to extract blocks from the DOM
+# JS function used to extract blocks from the DOM
 # ----------------------------------------------------------
 
-EXTRACT_JS = r"""
-(() => {
+EXTRACT_JS_FUNC = r"""
+() => {
     function getDataAttrs(el) {
         const res = {};
         if (!el || !el.attributes) return res;
@@ -25,6 +31,11 @@ EXTRACT_JS = r"""
         return res;
     }
 
+    // Resolve a URL against the document, as the browser does for a.href
+    function absUrl(u) {
+        try { return new URL(u, document.baseURI).href; } catch (e) { return u; }
+    }
+
     // Candidate selectors (Facebook + generic)
     let candidates = Array.from(document.querySelectorAll(
         [
@@ -61,23 +72,38 @@ EXTRACT_JS = r"""
 
     candidates = Array.from(new Set(candidates));
 
-    const blocks = [];
+    // Columnar (struct-of-arrays) result: one array per field, with the
+    // variable-length lists flattened and delimited by offset arrays
+    // (block i owns flat[offsets[i] .. offsets[i+1]]). Field names cross
+    // CDP once per scrape instead of once per block/link/image.
+    const cols = {
+        index: [], tag: [], role: [], className: [], dataAttrs: [],
+        text: [], snippet: [], textLength: [],
+        authorsFlat: [], authorsOffsets: [0],
+        timestampsFlat: [], timestampsOffsets: [0],
+        linksHrefFlat: [], linksTextFlat: [], linksOffsets: [0],
+        imagesSrcFlat: [], imagesAltFlat: [], imagesOffsets: [0],
+    };
     let index = 0;
 
     for (const el of candidates) {
         index += 1;
 
-        const tag = (el.tagName || "").toLowerCase();
-        const role = el.getAttribute("role") || "";
-        const className = el.className || "";
-        const dataAttrs = getDataAttrs(el);
-
         let fullText = "";
         try { fullText = (el.innerText || "").trim(); } catch (e) {}
 
         let snippet = fullText;
         if (snippet.length > 300) snippet = snippet.slice(0, 297) + "...";
 
+        cols.index.push(index);
+        cols.tag.push((el.tagName || "").toLowerCase());
+        cols.role.push(el.getAttribute("role") || "");
+        cols.className.push(el.className || "");
+        cols.dataAttrs.push(getDataAttrs(el));
+        cols.text.push(fullText);
+        cols.snippet.push(snippet);
+        cols.textLength.push(fullText.length);
+
         // Authors
         const authors = [];
         try {
@@ -92,6 +118,8 @@ EXTRACT_JS = r"""
                 }
             }
         } catch (e) {}
+        cols.authorsFlat.push(...authors);
+        cols.authorsOffsets.push(cols.authorsFlat.length);
 
         // Timestamps
         const timestamps = [];
@@ -111,73 +139,134 @@ EXTRACT_JS = r"""
                 }
             }
         } catch (e) {}
+        cols.timestampsFlat.push(...timestamps);
+        cols.timestampsOffsets.push(cols.timestampsFlat.length);
 
         // Links
-        const links = [];
         try {
             const linkEls = el.querySelectorAll("a[href]");
+            let count = 0;
             for (const a of linkEls) {
                 const href = (a.getAttribute("href") || "").trim();
                 if (!href) continue;
-                const text = (a.innerText || "").trim();
-                links.push({ href, text });
-                if (links.length >= 30) break;
+                cols.linksHrefFlat.push(a.href || href);
+                cols.linksTextFlat.push((a.innerText || "").trim());
+                if (++count >= 30) break;
             }
         } catch (e) {}
+        cols.linksOffsets.push(cols.linksHrefFlat.length);
 
         // Images
-        const images = [];
         try {
             const imgEls = el.querySelectorAll("img");
+            let count = 0;
             for (const img of imgEls) {
-                let src = (img.getAttribute("src") || img.getAttribute("data-src") || "").trim();
-                const srcset = (img.getAttribute("srcset") || "").trim();
+                // Best URL: what the browser loaded, then src/data-src,
+                // then the last (largest) srcset candidate
+                const rawSrc = (img.getAttribute("src") || img.getAttribute("data-src") || "").trim();
+                let src = img.currentSrc || (rawSrc ? absUrl(rawSrc) : "");
+                if (!src) {
+                    const parts = (img.getAttribute("srcset") || "")
+                        .split(",")
+                        .map(p => p.trim().split(/\s+/)[0])
+                        .filter(Boolean);
+                    if (parts.length) src = absUrl(parts[parts.length - 1]);
+                }
+                if (!src) continue;
                 const alt = (img.getAttribute("alt") || "").trim();
-                if (!src && !srcset) continue;
-                images.push({ src, srcset, alt });
-                if (images.length >= 30) break;
+                cols.imagesSrcFlat.push(src);
+                cols.imagesAltFlat.push(alt);
+                if (++count >= 30) break;
             }
         } catch (e) {}
-
-        blocks.push({
-            "index": index,
-            "tag": tag,
-            "role": role,
-            "className": className,
-            "dataAttrs": dataAttrs,
-            "text": fullText,
-            "snippet": snippet,
-            "textLength": fullText.length,
-            "authorCandidates": authors,
-            "timestampCandidates": timestamps,
-            "links": links,
-            "images": images,
-        });
+        cols.imagesOffsets.push(cols.imagesSrcFlat.length);
     }
 
-    return blocks;
-})();
+    return cols;
+}
 """
 
+# Registered once per context so V8 compiles the extractor once per document
+# and each scrape only sends a short call expression over CDP.
+INSTALL_EXTRACTOR_JS = "window.__extractBlocks = " + EXTRACT_JS_FUNC.strip() + ";"
+
+# The result is serialized in the page and parsed with orjson (when
+# available) rather than going through Playwright's per-value deserializer.
+# Evaluates to null when the extractor isn't installed in this document.
+EXTRACT_CALL_JS = (
+    "typeof window.__extractBlocks === 'function'"
+    " ? JSON.stringify(window.__extractBlocks()) : null"
+)
+
+# Fallback for documents loaded before install_extractor() ran (e.g. the tab
+# the user already had open): define the function and call it in one go.
+INSTALL_AND_EXTRACT_JS = (
+    "JSON.stringify((window.__extractBlocks = " + EXTRACT_JS_FUNC.strip() + ")())"
+)
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 # ----------------------------------------------------------
 # Python function used by the PRO scraper
 # ----------------------------------------------------------
 
+def _blocks_from_columns(cols):
+    """Rebuild the per-block dicts from the columnar extractor output."""
+
+    authors, a_off = cols["authorsFlat"], cols["authorsOffsets"]
+    stamps, t_off = cols["timestampsFlat"], cols["timestampsOffsets"]
+    l_href, l_text, l_off = cols["linksHrefFlat"], cols["linksTextFlat"], cols["linksOffsets"]
+    i_src, i_alt, i_off = cols["imagesSrcFlat"], cols["imagesAltFlat"], cols["imagesOffsets"]
+
+    if __debug__:
+        n = len(cols["index"])
+        assert len(a_off) == len(t_off) == len(l_off) == len(i_off) == n + 1
+
+    blocks = []
+    for i, (index, tag, role, class_name, data_attrs, text, snippet, text_len) in enumerate(zip(
+        cols["index"], cols["tag"], cols["role"], cols["className"],
+        cols["dataAttrs"], cols["text"], cols["snippet"], cols["textLength"],
+    )):
+        l0, l1 = l_off[i], l_off[i + 1]
+        m0, m1 = i_off[i], i_off[i + 1]
+        blocks.append({
+            "index": index,
+            "tag": tag,
+            "role": role,
+            "className": class_name,
+            "dataAttrs": data_attrs,
+            "text": text,
+            "snippet": snippet,
+            "textLength": text_len,
+            "authorCandidates": authors[a_off[i]:a_off[i + 1]],
+            "timestampCandidates": stamps[t_off[i]:t_off[i + 1]],
+            "links": [
+                {"href": href, "text": txt}
+                for href, txt in zip(l_href[l0:l1], l_text[l0:l1])
+            ],
+            "images": [
+                {"src": src, "alt": alt}
+                for src, alt in zip(i_src[m0:m1], i_alt[m0:m1])
+            ],
+        })
+
+    return blocks
+
+
+async def install_extractor(context):
+    """Expose the extractor as window.__extractBlocks in every new document."""
+    await context.add_init_script(INSTALL_EXTRACTOR_JS)
+
+
 async def extract_raw_blocks(page):
     """Executes JS in the browser context to extract raw blocks."""
 
-    blocks = await page.evaluate(EXTRACT_JS)
-
-    # Normalize empty lists
-    for b in blocks:
-        if b.get("authorCandidates") is None:
-            b["authorCandidates"] = []
-        if b.get("timestampCandidates") is None:
-            b["timestampCandidates"] = []
-        if b.get("links") is None:
-            b["links"] = []
-        if b.get("images") is None:
-            b["images"] = []
+    raw_json = await page.evaluate(EXTRACT_CALL_JS)
+    if raw_json is None:
+        # Extractor not installed in this document yet
+        raw_json = await page.evaluate(INSTALL_AND_EXTRACT_JS)
+
+    blocks = _blocks_from_columns(_json_loads(raw_json))
 
     return blocks
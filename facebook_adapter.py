@@ -4,11 +4,19 @@
 # This is the Facebook-specific logic used by facebook_scraper_pro.
 
 import re
-from urllib.parse import urljoin
+from functools import lru_cache
 
 
-def clean_author(author_list):
-    """Choose the most likely real author."""
+_NEWLINE_RUN_RE = re.compile(r"\n{3,}")
+_INVISIBLE_RE = re.compile(r"[\u200b\u200e\u200f\u202a-\u202c]")
+
+# Markers of real post permalinks: /posts/ and permalink URLs, __cft__
+# (precise post IDs), multi_permalinks and ?__tn__ (comments/permalinks)
+_PERMALINK_RE = re.compile(r"/posts/|permalink|__cft__|multi_permalinks|__tn__")
+
+
+@lru_cache(maxsize=4096)
+def _clean_author_tuple(author_list):
     if not author_list:
         return "Unknown Author"
 
@@ -32,8 +40,14 @@ def clean_author(author_list):
     return filtered[0]
 
 
-def clean_timestamp(ts_list):
-    """Pick the most usable timestamp string."""
+def clean_author(author_list):
+    """Choose the most likely real author."""
+    # Feeds repeat the same candidate lists, so the work is memoized per tuple
+    return _clean_author_tuple(tuple(author_list or ()))
+
+
+@lru_cache(maxsize=4096)
+def _clean_timestamp_tuple(ts_list):
     if not ts_list:
         return ""
 
@@ -43,36 +57,9 @@ def clean_timestamp(ts_list):
     return ts_list_sorted[0]
 
 
-def extract_permalink(links, page_url):
-    """Try to find a real permalink URL from the post's links."""
-    if not links:
-        return ""
-
-    for lk in links:
-        href = lk.get("href") or ""
-        abs_href = urljoin(page_url, href)
-
-        # REAL FACEBOOK POST PERMALINKS
-        if "/posts/" in abs_href:
-            return abs_href
-
-        if "permalink" in abs_href:
-            return abs_href
-
-        # __cft__ URLs hold precise post IDs
-        if "__cft__" in abs_href:
-            return abs_href
-
-        # multi permalinks
-        if "multi_permalinks" in abs_href:
-            return abs_href
-
-        # ?__tn__ often used for comments/permalinks
-        if "__tn__" in abs_href:
-            return abs_href
-
-    # fallback: first absolute link
-    return urljoin(page_url, links[0].get("href"))
+def clean_timestamp(ts_list):
+    """Pick the most usable timestamp string."""
+    return _clean_timestamp_tuple(tuple(ts_list or ()))
 
 
 def extract_text(raw_text):
@@ -80,57 +67,61 @@ def extract_text(raw_text):
     if not raw_text:
         return ""
 
-    txt = raw_text.strip()
-
     # Remove excessive linebreaks
-    txt = re.sub(r"\n{3,}", "\n\n", txt)
+    txt = _NEWLINE_RUN_RE.sub("\n\n", raw_text.strip())
 
     # Remove WhatsApp-smileys or invisible chars
-    txt = txt.replace("\u200b", "").replace("\u200e", "")
+    txt = _INVISIBLE_RE.sub("", txt)
 
     return txt.strip()
 
 
-def adapt_facebook_blocks(blocks, page_url):
+def adapt_facebook_blocks(blocks, page_url, timestamp_filter=None):
     """
     Takes raw blocks (from core_extractor) and converts them into structured
     Facebook posts.
+    If `timestamp_filter` is given, blocks whose cleaned timestamp it rejects
+    are skipped before the rest of the post is built.
     """
 
     structured = []
 
     for b in blocks:
-        # Author
-        author = clean_author(b.get("authorCandidates") or [])
+        _get = b.get
 
         # Timestamp
-        timestamp = clean_timestamp(b.get("timestampCandidates") or [])
+        timestamp = clean_timestamp(_get("timestampCandidates") or [])
+        if timestamp_filter is not None and not timestamp_filter(timestamp):
+            continue
 
-        # Permalink
-        permalink = extract_permalink(b.get("links") or [], page_url)
+        # Author
+        author = clean_author(_get("authorCandidates") or [])
 
         # Text
-        text = extract_text(b.get("text") or "")
+        text = extract_text(_get("text") or "")
 
         # Normalize images
-        images = []
-        for im in b.get("images") or []:
-            src = im.get("src") or ""
-            if src:
-                images.append(src)
+        images = [src for src in (im.get("src") for im in _get("images") or []) if src]
 
-        # Normalize links (absolute URLs)
+        # Links arrive already absolute (resolved by the browser); pick the
+        # permalink in the same pass instead of walking the links twice
+        permalink = ""
         final_links = []
-        for lk in b.get("links") or []:
-            href = lk.get("href") or ""
-            abs_href = urljoin(page_url, href)
+        for lk in _get("links") or []:
+            abs_href = lk.get("href") or page_url
             final_links.append({
                 "href": abs_href,
                 "text": lk.get("text") or abs_href
             })
+            if not permalink and _PERMALINK_RE.search(abs_href):
+                permalink = abs_href
+
+        # fallback: first absolute link
+        if not permalink and final_links:
+            permalink = final_links[0]["href"]
 
         structured.append({
-            "post_index": b.get("index"),
+            "post_index": _get("index"),
             "author": author,
             "text": text,
             "timestamp": timestamp,
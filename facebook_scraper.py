@@ -9,9 +9,13 @@ Facebook Scraper Deep - Enhanced version with:
 
 import asyncio
 import re
+from collections import defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from itertools import islice
+from html import escape as esc
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
-from core_extractor import extract_raw_blocks
+from core_extractor import extract_raw_blocks, install_extractor
 from facebook_adapter import adapt_facebook_blocks
 from utils import slugify_url
 import os
@@ -21,7 +25,27 @@ import os
 # DATE FILTERING UTILITIES
 # ============================================================
 
-def parse_facebook_date(timestamp_str: str) -> datetime | None:
+# One alternation for every relative unit ("2 h", "3 days ago", "1w"...)
+_REL_ONE = re.compile(r'(\d+)\s*(minutes?|mins?|hours?|hrs?|days?|weeks?|m|h|d|w)\b')
+
+_UNIT_CHARS = frozenset('mhdw')
+
+_UNIT_MAP = {
+    'm': 'minutes', 'min': 'minutes', 'mins': 'minutes',
+    'minute': 'minutes', 'minutes': 'minutes',
+    'h': 'hours', 'hr': 'hours', 'hrs': 'hours',
+    'hour': 'hours', 'hours': 'hours',
+    'd': 'days', 'day': 'days', 'days': 'days',
+    'w': 'weeks', 'week': 'weeks', 'weeks': 'weeks',
+}
+
+_AT_STRIP = re.compile(r'\s+at\s+\d+:\d+')
+
+# Leading single-letter relative time, checked before any date parsing
+_REL_QUICK = re.compile(r'^\s*(\d+)\s*([mhdw])\b')
+
+
+def parse_facebook_date(timestamp_str: str, now: datetime | None = None) -> datetime | None:
     """
     Parse Facebook timestamp formats:
     - "2 h" -> 2 hours ago
@@ -29,43 +53,52 @@ def parse_facebook_date(timestamp_str: str) -> datetime | None:
     - "1 w" -> 1 week ago
     - "14 November at 10:23"
     - "Yesterday at 15:30"
+    Relative forms are resolved against `now` (default: the current minute).
     """
-    if not timestamp_str:
+    ts = timestamp_str.strip() if timestamp_str else ""
+    if not ts:
         return None
-    
-    ts = timestamp_str.lower().strip()
-    now = datetime.now()
-    
-    # Relative times
-    patterns = [
-        (r'(\d+)\s*(?:minute|min|m)\s*(?:ago)?', 'minutes'),
-        (r'(\d+)\s*(?:hour|h)\s*(?:ago)?', 'hours'),
-        (r'(\d+)\s*(?:day|d)\s*(?:ago)?', 'days'),
-        (r'(\d+)\s*(?:week|w)\s*(?:ago)?', 'weeks'),
-    ]
-    
-    for pattern, unit in patterns:
-        match = re.search(pattern, ts)
-        if match:
-            value = int(match.group(1))
-            if unit == 'minutes':
-                return now - timedelta(minutes=value)
-            elif unit == 'hours':
-                return now - timedelta(hours=value)
-            elif unit == 'days':
-                return now - timedelta(days=value)
-            elif unit == 'weeks':
-                return now - timedelta(weeks=value)
-    
-    # Yesterday
+    if not ts.islower():
+        ts = ts.lower()
+    
+    # Timestamps repeat heavily across a feed: resolve against a
+    # minute-granular (or caller-fixed) "now" so identical strings hit the cache
+    if now is None:
+        now = datetime.now().replace(second=0, microsecond=0)
+    return _parse_facebook_date_cached(ts, now)
+
+
+@lru_cache(maxsize=4096)
+def _parse_facebook_date_cached(ts: str, now: datetime) -> datetime | None:
+    # Fast path for the short forms that dominate feeds ("2 h", "17h", "3d")
+    if ts and len(ts) < 8 and ts[-1] in _UNIT_CHARS:
+        num = ts[:-1].rstrip()
+        if num.isascii() and num.isdigit():
+            return now - timedelta(**{_UNIT_MAP[ts[-1]]: int(num)})
+    
+    # Yesterday (plain substring test, cheaper than the regex)
     if 'yesterday' in ts or 'ieri' in ts:
         return now - timedelta(days=1)
     
+    # Relative times
+    match = _REL_ONE.search(ts)
+    if match:
+        unit = _UNIT_MAP[match.group(2)]
+        return now - timedelta(**{unit: int(match.group(1))})
+    
     # Try parsing full dates (examples: "14 November at 10:23", "Nov 14 at 10:23")
     # This is approximate - Facebook's date format varies by locale
     try:
         # Remove "at HH:MM" part for basic parsing
-        date_part = re.sub(r'\s+at\s+\d+:\d+', '', ts)
+        date_part = _AT_STRIP.sub('', ts)
+        
+        # Every format below needs a day number and a month name; skip the
+        # strptime attempts (and their ValueErrors) when either is missing
+        if (len(date_part) < 3
+                or not any(c.isdigit() for c in date_part)
+                or not any(c.isalpha() for c in date_part)):
+            return None
+        
         for fmt in ['%d %B', '%B %d', '%d %b', '%b %d']:
             try:
                 parsed = datetime.strptime(date_part, fmt)
@@ -79,24 +112,107 @@ def parse_facebook_date(timestamp_str: str) -> datetime | None:
     return None
 
 
-def is_within_period(timestamp_str: str, days: int) -> bool:
-    """Check if timestamp is within the last N days."""
-    if days == 0:  # 0 means no filter
-        return True
-    
-    parsed_date = parse_facebook_date(timestamp_str)
-    if not parsed_date:
-        # If we can't parse, include it (safer)
+def is_within_period(timestamp_str: str, cutoff: datetime | None, days: int | None = None,
+                     now: datetime | None = None) -> bool:
+    """
+    Check if timestamp is not older than `cutoff` (None means no filter).
+    When the period length `days` is given, short relative times
+    ("2 h", "3 d", "1 w") are answered without parsing a date.
+    `now` is passed on to parse_facebook_date.
+    """
+    if cutoff is None:
         return True
     
-    cutoff = datetime.now() - timedelta(days=days)
-    return parsed_date >= cutoff
+    if days is not None and timestamp_str:
+        m = _REL_QUICK.match(timestamp_str.lower())
+        if m:
+            n = int(m.group(1))
+            unit = m.group(2)
+            if unit == 'm':
+                return n <= days * 24 * 60
+            if unit == 'h':
+                return n <= days * 24
+            if unit == 'd':
+                return n <= days
+            return n * 7 <= days
+    
+    parsed_date = parse_facebook_date(timestamp_str, now)
+    # If we can't parse, include it (safer)
+    return parsed_date is None or parsed_date >= cutoff
 
 
 # ============================================================
 # DEEP COMMENT EXPANSION
 # ============================================================
 
+# Expansion buttons as (CSS selector, text the element must contain).
+# The text test replaces Playwright's :has-text(), which plain
+# document.querySelectorAll does not understand.
+_EXPAND_SPECS = [
+    # English
+    ('div[role="button"]', "View more replies"),
+    ('div[role="button"]', "View more comments"),
+    ('div[role="button"]', "View previous comments"),
+    ('span', "more replies"),
+    ('span', "more comments"),
+    
+    # Italian
+    ('div[role="button"]', "Visualizza altre risposte"),
+    ('div[role="button"]', "Visualizza altri commenti"),
+    ('div[role="button"]', "Mostra commenti precedenti"),
+    
+    # Generic patterns
+    ('div[role="button"][aria-label*="repl"]', ""),
+    ('div[role="button"][aria-label*="comment"]', ""),
+]
+
+# Click at most 5 buttons per selector per iteration
+_MAX_CLICKS_PER_SELECTOR = 5
+
+# Counts DOM nodes added since the last reset, so after a click we can wait
+# exactly until Facebook has inserted the new comments.
+_MO_INSTALL_JS = """
+() => {
+    window.__fbNewNodes = 0;
+    if (window.__fbMutationObserver) return;
+    window.__fbMutationObserver = new MutationObserver(records => {
+        for (const r of records) window.__fbNewNodes += r.addedNodes.length;
+    });
+    window.__fbMutationObserver.observe(document.body, { childList: true, subtree: true });
+}
+"""
+
+# Finds and clicks every visible expansion button in one round-trip.
+# Matching is case-insensitive on textContent, like :has-text(). Elements
+# nested in (or wrapping) one already clicked are the same control, so
+# they are skipped rather than clicked again in the same pass.
+_CLICK_BATCH_JS = """
+({ specs, maxClicks, perSelector }) => {
+    let clicked = 0, remaining = 0;
+    const done = [];
+    window.__fbNewNodes = 0;
+    for (const [css, text] of specs) {
+        const needle = text.toLowerCase();
+        let count = 0;
+        for (const el of document.querySelectorAll(css)) {
+            if (done.some(d => d.contains(el) || el.contains(d))) continue;
+            if (needle && !(el.textContent || "").toLowerCase().includes(needle)) continue;
+            if (el.getClientRects().length === 0) continue;  // not visible
+            if (clicked >= maxClicks || count >= perSelector) {
+                remaining++;
+                continue;
+            }
+            try { el.click(); } catch (e) { continue; }
+            done.push(el);
+            clicked++;
+            count++;
+        }
+    }
+    return { clicked, remaining };
+}
+"""
+
+
 async def expand_all_comments(page, max_clicks=100, timeout_per_click=3000):
     """
     Recursively expand all comment threads by clicking:
@@ -104,68 +220,43 @@ async def expand_all_comments(page, max_clicks=100, timeout_per_click=3000):
     - "View X more comments"
     - "Show previous comments"
     - etc.
+    Each iteration clicks a batch of buttons inside the page, then waits up
+    to `timeout_per_click` ms for the new content to be inserted.
     """
     
     print("\n🔍 Expanding comment threads...")
     
-    selectors = [
-        # English
-        'div[role="button"]:has-text("View more replies")',
-        'div[role="button"]:has-text("View more comments")',
-        'div[role="button"]:has-text("View previous comments")',
-        'span:has-text("more replies")',
-        'span:has-text("more comments")',
-        
-        # Italian
-        'div[role="button"]:has-text("Visualizza altre risposte")',
-        'div[role="button"]:has-text("Visualizza altri commenti")',
-        'div[role="button"]:has-text("Mostra commenti precedenti")',
-        
-        # Generic patterns
-        'div[role="button"][aria-label*="repl"]',
-        'div[role="button"][aria-label*="comment"]',
-    ]
+    await page.evaluate(_MO_INSTALL_JS)
     
     clicks_made = 0
     iteration = 0
     
     while clicks_made < max_clicks and iteration < 50:
         iteration += 1
-        found_any = False
         
-        for selector in selectors:
-            try:
-                # Find all matching buttons
-                buttons = await page.query_selector_all(selector)
-                
-                for button in buttons[:5]:  # Click max 5 per selector per iteration
-                    try:
-                        # Check if visible
-                        is_visible = await button.is_visible()
-                        if not is_visible:
-                            continue
-                        
-                        # Click it
-                        await button.click(timeout=timeout_per_click)
-                        clicks_made += 1
-                        found_any = True
-                        
-                        print(f"   ✓ Clicked expansion button #{clicks_made}")
-                        
-                        # Wait for content to load
-                        await page.wait_for_timeout(1500)
-                        
-                    except (PlaywrightTimeout, Exception) as e:
-                        # Button might have disappeared or become unclickable
-                        continue
-                        
-            except Exception:
-                continue
+        try:
+            result = await page.evaluate(_CLICK_BATCH_JS, {
+                "specs": _EXPAND_SPECS,
+                "maxClicks": max_clicks - clicks_made,
+                "perSelector": _MAX_CLICKS_PER_SELECTOR,
+            })
+        except Exception:
+            break
         
-        if not found_any:
+        if not result["clicked"]:
             print(f"   ℹ️  No more expansion buttons found after {iteration} iterations")
             break
         
+        clicks_made += result["clicked"]
+        print(f"   ✓ Clicked {result['clicked']} expansion buttons "
+              f"(total {clicks_made}, {result['remaining']} pending)")
+        
+        # Wait for content to load: returns as soon as new nodes appear
+        try:
+            await page.wait_for_function("window.__fbNewNodes > 0", timeout=timeout_per_click)
+        except PlaywrightTimeout:
+            pass
+        
         # Scroll a bit to trigger lazy loading
         await page.evaluate("window.scrollBy(0, 500);")
         await page.wait_for_timeout(1000)
@@ -177,25 +268,43 @@ async def expand_all_comments(page, max_clicks=100, timeout_per_click=3000):
 # ENHANCED HTML REPORT WITH NESTING
 # ============================================================
 
-def generate_deep_html_report(posts, page_url, generated_label, out_path, period_filter):
-    """Generate HTML report with visual nesting indicators."""
-    
-    from html import escape as esc
+# Same output as html.escape, but one C-level pass instead of five
+# .replace() calls: used for the large post bodies and search blobs.
+_HTML_TT = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+
+def _esc(s: str) -> str:
+    return s.translate(_HTML_TT)
+
+
+def _render_deep_report(posts, page_url, generated_label, period_filter):
+    """Yield the deep HTML report fragment by fragment."""
     
     # Group by author
-    groups = {}
+    groups = defaultdict(list)
     for p in posts:
-        a = p.get("author") or "Unknown Author"
-        groups.setdefault(a, []).append(p)
+        groups[p.get("author") or "Unknown Author"].append(p)
+    
+    sorted_authors = sorted(groups, key=str.lower)
     
-    sorted_authors = sorted(groups.keys(), key=lambda x: x.lower())
+    # Escape each repeated string once
+    esc_authors = {a: esc(a) for a in sorted_authors}
+    esc_url = esc(page_url)
+    esc_gen = esc(generated_label)
+    esc_timestamps = {}
+    esc_ts_lowers = {}
     
-    h = []
-    h.append("<!DOCTYPE html>")
-    h.append("<html><head><meta charset='utf-8'><title>Facebook Deep Scraper</title>")
+    yield "<!DOCTYPE html>"
+    yield "<html><head><meta charset='utf-8'><title>Facebook Deep Scraper</title>"
     
     # CSS with nesting indicators
-    h.append("""
+    yield """
 <style>
 body {
     background:#0d1117;
@@ -303,10 +412,10 @@ input[type="text"], select {
     font-size:14px;
 }
 </style>
-""")
+"""
     
     # JavaScript
-    h.append("""
+    yield """
 <script>
 function toggleGroup(id){
     const el = document.getElementById(id);
@@ -354,40 +463,41 @@ document.addEventListener("DOMContentLoaded", () => {
     document.getElementById("visible_count").textContent = total;
 });
 </script>
-""")
+"""
     
-    h.append("</head><body>")
+    yield "</head><body>"
     
     # Title
-    h.append("<h1>🕵️‍♂️ Facebook Deep Scraper</h1>")
+    yield "<h1>🕵️‍♂️ Facebook Deep Scraper</h1>"
     
     # Period filter badge
     period_text = "All Time" if period_filter == 0 else f"Last {period_filter} days"
-    h.append(
+    yield (
         f"<div class='subtitle'>"
-        f"<strong>URL:</strong> {esc(page_url)}"
+        f"<strong>URL:</strong> {esc_url}"
         f"<span class='period-badge'>📅 {period_text}</span>"
         f"</div>"
     )
     
     # Stats bar
-    h.append(
+    yield (
         "<div class='stats-bar'>"
         "<strong>Total Posts:</strong> <span id='total_posts'>-</span> | "
         "<strong>Visible:</strong> <span id='visible_count'>-</span> | "
-        f"<strong>Generated:</strong> {esc(generated_label)}"
+        f"<strong>Generated:</strong> {esc_gen}"
         "</div>"
     )
     
     # Controls
-    h.append("<div class='controls'>")
-    h.append("<input id='flt_text' type='text' placeholder='Search text...' onkeyup='applyFilters()'>")
-    h.append("<select id='flt_author' onchange='applyFilters()'>")
-    h.append("<option value='ALL'>All Authors</option>")
-    for a in sorted_authors:
-        h.append(f"<option value='{esc(a)}'>{esc(a)}</option>")
-    h.append("</select>")
-    h.append("</div>")
+    yield "<div class='controls'>"
+    yield "<input id='flt_text' type='text' placeholder='Search text...' onkeyup='applyFilters()'>"
+    yield "<select id='flt_author' onchange='applyFilters()'>"
+    yield "<option value='ALL'>All Authors</option>"
+    yield "".join(
+        "<option value='%s'>%s</option>" % (ea, ea) for ea in esc_authors.values()
+    )
+    yield "</select>"
+    yield "</div>"
     
     # Author groups
     gid = 0
@@ -395,11 +505,12 @@ document.addEventListener("DOMContentLoaded", () => {
         posts_list = groups[author]
         gid += 1
         group_id = f"group_{gid}"
+        esc_author = esc_authors[author]
         
-        h.append(
-            f"<div class='author-group' data-author='{esc(author)}'>"
+        yield (
+            f"<div class='author-group' data-author='{esc_author}'>"
             f"<div class='author-header' onclick=\"toggleGroup('{group_id}')\">"
-            f"👤 {esc(author)} <small>({len(posts_list)} posts)</small>"
+            f"👤 {esc_author} <small>({len(posts_list)} posts)</small>"
             f"</div>"
             f"<div class='author-body' id='{group_id}'>"
         )
@@ -413,133 +524,176 @@ document.addEventListener("DOMContentLoaded", () => {
             links = p.get("links") or []
             
             # Estimate nesting depth (heuristic based on text indentation)
-            text_lines = text.split('\n')
-            leading_spaces = min((len(line) - len(line.lstrip()) for line in text_lines if line.strip()), default=0)
+            # (smallest indent over non-blank lines; stops at the first
+            # unindented line since the minimum can't go lower)
+            leading_spaces = 0
+            for line in text.splitlines():
+                stripped = line.lstrip()
+                if not stripped:
+                    continue
+                lead = len(line) - len(stripped)
+                if lead == 0:
+                    leading_spaces = 0
+                    break
+                if leading_spaces == 0 or lead < leading_spaces:
+                    leading_spaces = lead
             depth = min(leading_spaces // 4, 5)  # Cap at depth 5
             
-            search_blob = f"{text} {author} {timestamp}".lower()
+            # The author is already matched through the group's data-author
+            esc_ts_lower = esc_ts_lowers.get(timestamp)
+            if esc_ts_lower is None:
+                esc_ts_lower = esc_ts_lowers[timestamp] = _esc(timestamp.lower())
             
-            h.append(f"<div class='post-card' data-search='{esc(search_blob)}'>")
+            # Build the card locally and hand it to the writer as one string
+            post_parts = []
+            app = post_parts.append
             
-            h.append(
+            app(f"<div class='post-card' data-search='{_esc(text.lower())} {esc_ts_lower}'>")
+            
+            app(
                 f"<div class='post-header'>"
                 f"<div><strong>Post {idx}</strong>"
             )
             if depth > 0:
-                h.append(f"<span class='depth-indicator'>Depth: {depth}</span>")
-            h.append("</div>")
-            h.append(f"<div class='post-meta'>🕒 {esc(timestamp)}</div>")
-            h.append("</div>")
+                app(f"<span class='depth-indicator'>Depth: {depth}</span>")
+            app("</div>")
+            esc_ts = esc_timestamps.get(timestamp)
+            if esc_ts is None:
+                esc_ts = esc_timestamps[timestamp] = esc(timestamp)
+            app(f"<div class='post-meta'>🕒 {esc_ts}</div>")
+            app("</div>")
             
             if permalink:
-                h.append(
+                app(
                     f"<div class='post-meta'>"
                     f"🔗 <a href='{esc(permalink)}' target='_blank'>Permalink</a>"
                     f"</div>"
                 )
             
             if text:
-                h.append(f"<div class='post-text'>{esc(text)}</div>")
+                app(f"<div class='post-text'>{_esc(text)}</div>")
             
             if images:
-                h.append("<div class='images'><strong>📷 Images:</strong><br>")
-                for src in images[:8]:
-                    h.append(
-                        f"<a href='{esc(src)}' target='_blank'>"
-                        f"<img class='thumb-img' src='{esc(src)}'>"
-                        f"</a>"
-                    )
-                h.append("</div>")
+                app("<div class='images'><strong>📷 Images:</strong><br>")
+                app("\n".join(
+                    f"<a href='{src}' target='_blank'><img class='thumb-img' src='{src}'></a>"
+                    for src in map(esc, islice(images, 8))
+                ))
+                app("</div>")
             
             if links:
-                h.append("<div class='links'><strong>🔗 Links:</strong>")
-                for lk in links[:8]:
-                    h.append(
-                        f"<div>→ <a href='{esc(lk['href'])}' target='_blank'>{esc(lk['text'])}</a></div>"
-                    )
-                h.append("</div>")
+                app("<div class='links'><strong>🔗 Links:</strong>")
+                for lk in islice(links, 8):
+                    esc_href = esc(lk['href'])
+                    esc_text = esc_href if lk['text'] == lk['href'] else esc(lk['text'])
+                    app(f"<div>→ <a href='{esc_href}' target='_blank'>{esc_text}</a></div>")
+                app("</div>")
+            
+            app("</div>")  # post-card
             
-            h.append("</div>")  # post-card
+            yield "\n".join(post_parts)
         
-        h.append("</div></div>")  # author-body + group
+        yield "</div></div>"  # author-body + group
     
-    h.append("</body></html>")
+    yield "</body></html>"
+
+
+def generate_deep_html_report(posts, page_url, generated_label, out_path, period_filter):
+    """Generate HTML report with visual nesting indicators."""
     
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(h))
+    # Fragments go straight from the renderer to the file buffer, so the
+    # report is never held in memory as a whole
+    with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(
+            chunk + "\n"
+            for chunk in _render_deep_report(posts, page_url, generated_label, period_filter)
+        )
 
 
 # ============================================================
-# MAIN FUNCTION
+# AUTO-SCROLL
 # ============================================================
 
-async def main():
-    print("\n" + "="*60)
-    print("🕵️‍♂️  FACEBOOK DEEP SCRAPER")
-    print("="*60 + "\n")
-    
-    # Period filter
-    print("📅 Period Filter:")
-    print("   0 = All time")
-    print("   1 = Last 24 hours")
-    print("   7 = Last week")
-    print("   30 = Last month")
-    period_input = input("Enter days (0 for all): ").strip()
-    period_days = int(period_input) if period_input.isdigit() else 0
-    
-    # Text filter
-    filter_text = input("\n🔍 Filter by text (blank = any): ").strip().lower()
-    
-    # Auto-scroll
-    auto_s = input("\n📜 Auto-scroll? (y/N): ").strip().lower()
-    do_scroll = (auto_s == "y")
-    
-    scroll_steps = 10
-    if do_scroll:
-        scroll_input = input("   Scroll steps (default 10): ").strip()
-        scroll_steps = int(scroll_input) if scroll_input.isdigit() else 10
-    
-    # Deep expansion
-    expand_input = input("\n🔁 Expand all comments recursively? (Y/n): ").strip().lower()
-    do_expand = (expand_input != "n")
-    
-    max_expansion_clicks = 100
-    if do_expand:
-        clicks_input = input("   Max expansion clicks (default 100): ").strip()
-        max_expansion_clicks = int(clicks_input) if clicks_input.isdigit() else 100
-    
-    print("\n" + "="*60)
-    print("🌐 Connecting to Chromium on port 9222...")
-    print("   If not running: chromium --remote-debugging-port=9222")
-    print("="*60 + "\n")
-    
-    playwright = await async_playwright().start()
-    
-    try:
-        browser = await playwright.chromium.connect_over_cdp("http://localhost:9222")
-    except Exception as e:
-        print("❌ Could not connect to Chromium")
-        print(f"   Error: {e}\n")
-        return
-    
-    if not browser.contexts:
-        print("❌ No active contexts found in Chromium\n")
-        return
+# Runs the whole scroll/settle loop inside the page, so N steps cost a single
+# CDP round-trip instead of N evaluate calls plus Python-side sleeps.
+AUTO_SCROLL_JS = """
+async ({ steps, delayMs }) => {
+    for (let i = 0; i < steps; i++) {
+        window.scrollBy(0, 1500);
+        await new Promise(r => setTimeout(r, delayMs));
+    }
+}
+"""
+
+
+# ============================================================
+# SHARED BROWSER SESSION
+# ============================================================
+
+CDP_URL = "http://localhost:9222"
+
+# Upper bound on tabs scraped at once, so Chromium is not saturated
+MAX_CONCURRENT_PAGES = 8
+
+# Playwright and the CDP connection are far more expensive to set up than a
+# page, so they are created once and reused by every scrape in the process.
+_playwright = None
+_browser = None
+_browser_lock = asyncio.Lock()
+
+
+async def get_browser(cdp_url=CDP_URL):
+    """Return the shared CDP browser, starting Playwright on first use."""
+    global _playwright, _browser
     
-    ctx = browser.contexts[0]
-    page = ctx.pages[0]
-    page_url = page.url
+    async with _browser_lock:
+        if _browser is not None and _browser.is_connected():
+            return _browser
+        
+        if _playwright is None:
+            _playwright = await async_playwright().start()
+        
+        _browser = await _playwright.chromium.connect_over_cdp(cdp_url)
+        return _browser
+
+
+async def close_browser():
+    """Disconnect from Chromium and stop the shared Playwright instance."""
+    global _playwright, _browser
     
-    print(f"✅ Attached to page: {page_url}\n")
+    async with _browser_lock:
+        if _browser is not None:
+            try:
+                await _browser.close()
+            except:
+                pass
+            _browser = None
+        
+        if _playwright is not None:
+            try:
+                await _playwright.stop()
+            except:
+                pass
+            _playwright = None
+
+
+# ============================================================
+# SCRAPE PIPELINE
+# ============================================================
+
+async def scrape(page, page_url, filter_text="", period_days=0,
+                 do_scroll=False, scroll_steps=10,
+                 do_expand=True, max_expansion_clicks=100):
+    """
+    Scroll, expand, extract and report on an already-open page.
+    Returns (posts, report_path).
+    """
     
     # Auto-scroll
     if do_scroll:
         print(f"📜 Scrolling {scroll_steps} steps...")
-        for i in range(scroll_steps):
-            await page.evaluate("window.scrollBy(0, 1500);")
-            await asyncio.sleep(1.5)
-            print(f"   Step {i+1}/{scroll_steps}")
-        print()
+        await page.evaluate(AUTO_SCROLL_JS, {"steps": scroll_steps, "delayMs": 1500})
+        print(f"   Done {scroll_steps}/{scroll_steps}\n")
     
     # Deep expansion
     if do_expand:
@@ -552,25 +706,27 @@ async def main():
     
     # Text filter
     if filter_text:
+        filter_re = re.compile(re.escape(filter_text), re.IGNORECASE)
         raw_blocks = [
             b for b in raw_blocks
-            if filter_text in (b.get("text") or "").lower()
+            if filter_re.search(b.get("text") or "")
         ]
         print(f"   After text filter: {len(raw_blocks)} blocks\n")
     
-    # Adapt to Facebook structure
+    # Adapt to Facebook structure; the period filter runs inside the
+    # adapter so rejected blocks never get turned into posts
     print("🔄 Applying Facebook adapter...")
-    adapted = adapt_facebook_blocks(raw_blocks, page_url)
-    
-    # Period filter
+    timestamp_filter = None
     if period_days > 0:
         print(f"📅 Filtering by period (last {period_days} days)...")
-        before_count = len(adapted)
-        adapted = [
-            p for p in adapted
-            if is_within_period(p.get("timestamp") or "", period_days)
-        ]
-        print(f"   Kept {len(adapted)}/{before_count} posts\n")
+        _now = datetime.now()
+        cutoff = _now - timedelta(days=period_days)
+        timestamp_filter = partial(is_within_period, cutoff=cutoff, days=period_days, now=_now)
+    
+    adapted = adapt_facebook_blocks(raw_blocks, page_url, timestamp_filter)
+    
+    if period_days > 0:
+        print(f"   Kept {len(adapted)}/{len(raw_blocks)} posts\n")
     
     # Generate output path
     os.makedirs("reports", exist_ok=True)
@@ -596,22 +752,137 @@ async def main():
         period_filter=period_days
     )
     
-    print("="*60)
-    print("✅ SCRAPING COMPLETE")
-    print("="*60)
-    print(f"\n📊 Total posts collected: {len(adapted)}")
-    print(f"📄 Report saved to: {out_path}\n")
+    return adapted, out_path
+
+
+async def run_once(ctx, url, **options):
+    """Open `url` in a new tab of `ctx`, scrape it and close the tab."""
+    page = await ctx.new_page()
+    try:
+        await page.goto(url)
+        return await scrape(page, page.url, **options)
+    finally:
+        await page.close()
+
+
+async def scrape_many(ctx, urls, concurrency=MAX_CONCURRENT_PAGES, **options):
+    """
+    Scrape several URLs concurrently, each in its own tab of `ctx`.
+    Returns a (posts, report_path) tuple for every URL that succeeded, in
+    input order; failures are reported per URL and don't stop the others.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    
+    async def _one(url):
+        async with sem:
+            return await run_once(ctx, url, **options)
+    
+    outcomes = await asyncio.gather(*(_one(u) for u in urls), return_exceptions=True)
+    
+    results = []
+    for url, outcome in zip(urls, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"❌ Failed to scrape {url}: {outcome}")
+        else:
+            results.append(outcome)
+    return results
+
+
+# ============================================================
+# MAIN FUNCTION
+# ============================================================
+
+async def main():
+    print("\n" + "="*60)
+    print("🕵️‍♂️  FACEBOOK DEEP SCRAPER")
+    print("="*60 + "\n")
+    
+    # Period filter
+    print("📅 Period Filter:")
+    print("   0 = All time")
+    print("   1 = Last 24 hours")
+    print("   7 = Last week")
+    print("   30 = Last month")
+    period_input = input("Enter days (0 for all): ").strip()
+    period_days = int(period_input) if period_input.isdigit() else 0
+    
+    # Text filter
+    filter_text = input("\n🔍 Filter by text (blank = any): ").strip().lower()
+    
+    # Auto-scroll
+    auto_s = input("\n📜 Auto-scroll? (y/N): ").strip().lower()
+    do_scroll = (auto_s == "y")
+    
+    scroll_steps = 10
+    if do_scroll:
+        scroll_input = input("   Scroll steps (default 10): ").strip()
+        scroll_steps = int(scroll_input) if scroll_input.isdigit() else 10
+    
+    # Deep expansion
+    expand_input = input("\n🔁 Expand all comments recursively? (Y/n): ").strip().lower()
+    do_expand = (expand_input != "n")
+    
+    max_expansion_clicks = 100
+    if do_expand:
+        clicks_input = input("   Max expansion clicks (default 100): ").strip()
+        max_expansion_clicks = int(clicks_input) if clicks_input.isdigit() else 100
+    
+    # Extra pages, scraped in parallel tabs after the attached one
+    extra_input = input("\n🌍 Extra URLs to scrape in parallel (space separated, blank = none): ")
+    extra_urls = extra_input.split()
+    
+    print("\n" + "="*60)
+    print("🌐 Connecting to Chromium on port 9222...")
+    print("   If not running: chromium --remote-debugging-port=9222")
+    print("="*60 + "\n")
     
-    # Cleanup
     try:
-        await browser.close()
-    except:
-        pass
+        browser = await get_browser()
+    except Exception as e:
+        print("❌ Could not connect to Chromium")
+        print(f"   Error: {e}\n")
+        await close_browser()
+        return
     
     try:
-        await playwright.stop()
-    except:
-        pass
+        if not browser.contexts:
+            print("❌ No active contexts found in Chromium\n")
+            return
+        
+        ctx = browser.contexts[0]
+        page = ctx.pages[0]
+        page_url = page.url
+        
+        print(f"✅ Attached to page: {page_url}\n")
+        
+        await install_extractor(ctx)
+        
+        options = dict(
+            filter_text=filter_text,
+            period_days=period_days,
+            do_scroll=do_scroll,
+            scroll_steps=scroll_steps,
+            do_expand=do_expand,
+            max_expansion_clicks=max_expansion_clicks
+        )
+        
+        results = [await scrape(page, page_url, **options)]
+        
+        if extra_urls:
+            print(f"🌍 Scraping {len(extra_urls)} extra page(s) in parallel...\n")
+            results += await scrape_many(ctx, extra_urls, **options)
+        
+        print("="*60)
+        print("✅ SCRAPING COMPLETE")
+        print("="*60)
+        for adapted, out_path in results:
+            print(f"\n📊 Total posts collected: {len(adapted)}")
+            print(f"📄 Report saved to: {out_path}")
+        print()
+    
+    finally:
+        # Cleanup
+        await close_browser()
 
 
 if __name__ == "__main__":
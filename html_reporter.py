@@ -11,33 +11,21 @@
 
 from html import escape as esc
 import datetime
+from collections import defaultdict
+from itertools import islice
+import operator
 
 
-def generate_html_report(posts, page_url, generated_label, out_path):
+# ----------------------------------------------------------
+# Static page assets
+# ----------------------------------------------------------
 
-    # --- Convert date into dd/mm/yy - HH:MM:SS ---
-    try:
-        dt = datetime.datetime.strptime(generated_label, "%Y %B, %d - %H:%M:%S")
-        formatted_date = dt.strftime("%d/%m/%y - %H:%M:%S")
-    except:
-        formatted_date = generated_label
-
-    # --- Group posts by author ---
-    groups = {}
-    for p in posts:
-        a = p.get("author") or "Unknown Author"
-        groups.setdefault(a, []).append(p)
-
-    sorted_authors = sorted(groups.keys(), key=lambda x: x.lower())
-
-    # --- Start HTML ---
-    h = []
-    h.append("<!DOCTYPE html>")
-    h.append("<html><head><meta charset='utf-8'><title>Facebook Scraper Pro</title>")
+_HEAD = (
+    "<!DOCTYPE html>\n"
+    "<html><head><meta charset='utf-8'><title>Facebook Scraper Pro</title>\n"
+)
 
-    # --- CSS ---
-    h.append("""
-<style>
+_CSS = """<style>
 body {
     background:#0d1117;
     color:#e6edf3;
@@ -125,6 +113,9 @@ input[type="text"], select {
     color:#58a6ff;
     align-self:center;
 }
+.hidden {
+    display:none;
+}
 .page-url {
     font-size:15px;
     color:#58a6ff;
@@ -133,103 +124,121 @@ input[type="text"], select {
     font-weight:500;
 }      
 </style>
-""")
+"""
 
-    # --- JavaScript ---
-    h.append("""
-<script>
+_JS = """<script>
 
 function toggleGroup(id){
     const el = document.getElementById(id);
     el.style.display = (el.style.display === "none" || !el.style.display) ? "block" : "none";
 }
 
+// Groups and their cards, read from the DOM once at load
+let _groups = null;
+
+function cacheGroups(){
+    _groups = Array.from(document.querySelectorAll(".author-group")).map(g=>({
+        el: g,
+        author: g.dataset.author,
+        cards: Array.from(g.querySelectorAll(".post-card")).map(c=>({el: c, blob: c.dataset.search}))
+    }));
+}
+
 function applyFilters(){
     const textQ = document.getElementById("flt_text").value.toLowerCase();
     const authorQ = document.getElementById("flt_author").value;
 
-    document.querySelectorAll(".author-group").forEach(group=>{
-        const author = group.getAttribute("data-author");
+    if(!_groups) cacheGroups();
+
+    // Take the container out of layout while the classes change,
+    // so the page reflows once instead of once per card
+    const container = document.getElementById("groups_container");
+    container.style.display = "none";
+
+    for(const group of _groups){
         let groupVisible = true;
 
-        if(authorQ !== "ALL" && author !== authorQ){
+        if(authorQ !== "ALL" && group.author !== authorQ){
             groupVisible = false;
         }
 
         let anyVisible = false;
 
-        group.querySelectorAll(".post-card").forEach(card=>{
-            const blob = card.getAttribute("data-search");
+        for(const card of group.cards){
             let visible = true;
 
-            if(textQ && !blob.includes(textQ)) visible = false;
+            if(textQ && !card.blob.includes(textQ)) visible = false;
 
-            card.style.display = visible ? "" : "none";
+            card.el.classList.toggle("hidden", !visible);
             if(visible) anyVisible = true;
-        });
+        }
+
+        group.el.classList.toggle("hidden", !(groupVisible && anyVisible));
+    }
 
-        group.style.display = (groupVisible && anyVisible) ? "" : "none";
-    });
+    container.style.display = "";
 }
 
 
+// Sorted group order per mode; the set of groups never changes after load
+const _sortCache = {};
+
 function applySorting() {
     const mode = document.getElementById("sort_mode").value;
     const container = document.getElementById("groups_container");
-    const groups = Array.from(container.children);
-
-    groups.sort((a,b)=>{
-        const a_name = a.getAttribute("data-author").toLowerCase();
-        const b_name = b.getAttribute("data-author").toLowerCase();
-        const a_count = parseInt(a.getAttribute("data-count"));
-        const b_count = parseInt(b.getAttribute("data-count"));
-
-        switch(mode){
-            case "az":
-                return a_name.localeCompare(b_name);
-            case "za":
-                return b_name.localeCompare(a_name);
-            case "count_desc":
-                return b_count - a_count;
-            case "count_asc":
-                return a_count - b_count;
-        }
-    });
 
-    groups.forEach(g=>container.appendChild(g));
+    let groups = _sortCache[mode];
+    if(!groups){
+        groups = Array.from(container.children);
+
+        groups.sort((a,b)=>{
+            const a_name = a.getAttribute("data-author").toLowerCase();
+            const b_name = b.getAttribute("data-author").toLowerCase();
+            const a_count = parseInt(a.getAttribute("data-count"));
+            const b_count = parseInt(b.getAttribute("data-count"));
+
+            switch(mode){
+                case "az":
+                    return a_name.localeCompare(b_name);
+                case "za":
+                    return b_name.localeCompare(a_name);
+                case "count_desc":
+                    return b_count - a_count;
+                case "count_asc":
+                    return a_count - b_count;
+            }
+        });
+
+        _sortCache[mode] = groups;
+    }
+
+    const frag = document.createDocumentFragment();
+    groups.forEach(g=>frag.appendChild(g));
+    container.appendChild(frag);
 }
 
 
 document.addEventListener("DOMContentLoaded", () => {
+    cacheGroups();
     let total = document.querySelectorAll(".post-card").length;
     document.getElementById("total_posts_inline").textContent = total;
 });
 
 </script>
-""")
-
-    # Title
-    h.append("<h1 style='margin-bottom:6px;'>Facebook Scraper Pro</h1>")
+"""
 
-    # URL + Total posts (on same line)
-    h.append(
-        f"<div class='page-url'>{esc(page_url)}"
-        f" - Total Posts: <span id='total_posts_inline'></span></div>"
-)
 
-    # --- Filters + Sorting + Total posts ---
-    h.append("""
+# Filters + sorting controls around the per-author <option> list
+_CONTROLS_HEAD = """
 <div class='controls'>
     <input id='flt_text' type='text' placeholder='Search text...' onkeyup='applyFilters()'>
 
     <select id='flt_author' onchange='applyFilters()'>
         <option value='ALL'>Authors</option>
-""")
 
-    for a in sorted_authors:
-        h.append(f"<option value='{esc(a)}'>{esc(a)}</option>")
+"""
 
-    h.append("""
+_CONTROLS_TAIL = """
     </select>
 
     <select id="sort_mode" onchange="applySorting()">
@@ -243,80 +252,176 @@ document.addEventListener("DOMContentLoaded", () => {
     <span id="total_posts" class="total-posts"></span>
 
 </div>
-""")
-
-    # --- Author groups ---
-    h.append("<div id='groups_container'>")
-
-    gid = 0
-    for author in sorted_authors:
-        posts_list = groups[author]
-        gid += 1
-        group_id = f"group_{gid}"
-
-        h.append(
-            f"<div class='author-group' data-author='{esc(author)}' data-count='{len(posts_list)}'>"
-            f"<div class='author-header' onclick=\"toggleGroup('{group_id}')\">"
-            f"{esc(author)} ({len(posts_list)} posts)"
-            f"</div>"
-            f"<div class='author-body' id='{group_id}'>"
+
+"""
+
+# Attribute escaping for the search blob in one translate pass. The
+# attribute is single-quoted, so "'" is escaped too (same output as esc)
+_ATTR_TRANS = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+})
+
+# Post cards are rendered from one template per shape: bit flags for the
+# optional sections, and the template for each observed combination is
+# assembled on first use
+_HAS_TEXT = 1
+_HAS_PERMALINK = 2
+_HAS_IMAGES = 4
+_HAS_LINKS = 8
+
+_POST_HEAD = (
+    "<div class='post-card' data-search='{search}'>\n"
+    "<div class='post-header'>"
+    "<div><strong>Post {idx}</strong></div>"
+    "<div class='post-meta'>{timestamp}</div>"
+    "</div>\n"
+)
+
+# In output order
+_POST_SECTIONS = (
+    (_HAS_PERMALINK,
+     "<div class='post-meta'>Permalink: "
+     "<a href='{permalink}' target='_blank'>{permalink}</a>"
+     "</div>\n"),
+    (_HAS_TEXT,
+     "<div class='post-text'>{text}</div>\n"),
+    (_HAS_IMAGES,
+     "<div class='images'><strong>Images:</strong><br>\n{images}</div>\n"),
+    (_HAS_LINKS,
+     "<div class='links'><strong>Links:</strong>\n{links}</div>\n"),
+)
+
+_TEMPLATES = {}
+
+
+def _post_template(mask):
+    tpl = _TEMPLATES.get(mask)
+    if tpl is None:
+        tpl = _TEMPLATES[mask] = (
+            _POST_HEAD
+            + "".join(section for bit, section in _POST_SECTIONS if mask & bit)
+            + "</div>\n"
         )
+    return tpl
 
-        for p in posts_list:
-            idx = p.get("post_index")
-            text = p.get("text") or ""
-            timestamp = p.get("timestamp") or ""
-            permalink = p.get("permalink") or ""
-            images = p.get("images") or []
-            links = p.get("links") or []
 
-            search_blob = f"{text} {author} {timestamp} {permalink}".lower()
+_LINK_TEMPLATE = "<div>- <a href='{href}' target='_blank'>{text}</a></div>\n"
 
-            h.append(f"<div class='post-card' data-search='{esc(search_blob)}'>")
 
-            h.append(
-                f"<div class='post-header'>"
-                f"<div><strong>Post {idx}</strong></div>"
-                f"<div class='post-meta'>{esc(timestamp)}</div>"
-                f"</div>"
-            )
+_POST_FIELDS = ("post_index", "text", "timestamp", "permalink", "images", "links")
+_get_post_fields = operator.itemgetter(*_POST_FIELDS)
 
-            if permalink:
-                h.append(
-                    f"<div class='post-meta'>Permalink: "
-                    f"<a href='{esc(permalink)}' target='_blank'>{esc(permalink)}</a>"
-                    f"</div>"
-                )
 
-            if text:
-                h.append(f"<div class='post-text'>{esc(text)}</div>")
+def _post_fields(p):
+    """Read the rendered post fields in one call, defaulting missing/None ones."""
+    try:
+        idx, text, timestamp, permalink, images, links = _get_post_fields(p)
+    except KeyError:
+        idx, text, timestamp, permalink, images, links = map(p.get, _POST_FIELDS)
+    return idx, text or "", timestamp or "", permalink or "", images or (), links or ()
+
+
+def generate_html_report(posts, page_url, generated_label, out_path):
+
+    # --- Convert date into dd/mm/yy - HH:MM:SS ---
+    try:
+        dt = datetime.datetime.strptime(generated_label, "%Y %B, %d - %H:%M:%S")
+        formatted_date = dt.strftime("%d/%m/%y - %H:%M:%S")
+    except:
+        formatted_date = generated_label
+
+    # --- Group posts by author ---
+    groups = defaultdict(list)
+    for p in posts:
+        groups[p.get("author") or "Unknown Author"].append(p)
+
+    # Sort on precomputed (casefold, name) pairs instead of a key lambda
+    sorted_authors = [a for _, a in sorted((a.casefold(), a) for a in groups)]
 
-            if images:
-                h.append("<div class='images'><strong>Images:</strong><br>")
-                for src in images[:8]:
-                    h.append(
-                        f"<a href='{esc(src)}' target='_blank'>"
-                        f"<img class='thumb-img' src='{esc(src)}'>"
-                        f"</a>"
-                    )
-                h.append("</div>")
+    # Authors, permalinks and timestamps repeat across the feed: escape
+    # each distinct value once
+    _esc_cache = {}
 
-            if links:
-                h.append("<div class='links'><strong>Links:</strong>")
-                for lk in links[:8]:
-                    h.append(
-                        f"<div>- <a href='{esc(lk['href'])}' target='_blank'>{esc(lk['text'])}</a></div>"
-                    )
-                h.append("</div>")
+    def e(s, _c=_esc_cache, _esc=esc):
+        v = _c.get(s)
+        return v if v is not None else _c.setdefault(s, _esc(s))
+
+    # --- Stream HTML straight to the file ---
+    with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        write = f.write
+        write(_HEAD)
+        write(_CSS)
+        write(_JS)
+
+        # Title
+        write("<h1 style='margin-bottom:6px;'>Facebook Scraper Pro</h1>\n")
+
+        # URL + Total posts (on same line)
+        write(
+            f"<div class='page-url'>{esc(page_url)}"
+            f" - Total Posts: <span id='total_posts_inline'></span></div>\n"
+        )
 
-            h.append("</div>")  # post-card
+        # --- Filters + Sorting + Total posts ---
+        write(_CONTROLS_HEAD)
 
-        h.append("</div></div>")  # group
+        write("".join(f"<option value='{ea}'>{ea}</option>\n" for ea in map(e, sorted_authors)))
 
-    h.append("</div>")  # groups_container
+        write(_CONTROLS_TAIL)
 
-    # Close doc
-    h.append("</body></html>")
+        # --- Author groups ---
+        write("<div id='groups_container'>\n")
+
+        gid = 0
+        for author in sorted_authors:
+            posts_list = groups[author]
+            gid += 1
+            group_id = f"group_{gid}"
+
+            write(
+                f"<div class='author-group' data-author='{e(author)}' data-count='{len(posts_list)}'>"
+                f"<div class='author-header' onclick=\"toggleGroup('{group_id}')\">"
+                f"{e(author)} ({len(posts_list)} posts)"
+                f"</div>"
+                f"<div class='author-body' id='{group_id}'>\n"
+            )
+
+            for p in posts_list:
+                idx, text, timestamp, permalink, images, links = _post_fields(p)
+
+                # The author is matched through the group's data-author
+                search_blob = f"{text} {timestamp} {permalink}".lower().translate(_ATTR_TRANS)
+
+                mask = (
+                    (_HAS_TEXT if text else 0)
+                    | (_HAS_PERMALINK if permalink else 0)
+                    | (_HAS_IMAGES if images else 0)
+                    | (_HAS_LINKS if links else 0)
+                )
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(h))
+                write(_post_template(mask).format(
+                    search=search_blob,
+                    idx=idx,
+                    timestamp=e(timestamp),
+                    permalink=e(permalink),
+                    text=esc(text),
+                    images="".join(
+                        f"<a href='{src}' target='_blank'><img class='thumb-img' src='{src}'></a>\n"
+                        for src in map(esc, islice(images, 8))
+                    ),
+                    links="".join(
+                        _LINK_TEMPLATE.format(href=esc(lk['href']), text=esc(lk['text']))
+                        for lk in islice(links, 8)
+                    ),
+                ))
+
+            write("</div></div>\n")  # group
+
+        write("</div>\n")  # groups_container
+
+        # Close doc
+        write("</body></html>")
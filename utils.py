@@ -3,36 +3,52 @@
 # Common helper functions used by the Facebook Scraper PRO project.
 
 import re
+from functools import lru_cache
 
 
+_SLUG_SCHEME_RE = re.compile(r"^https?://")
+_SLUG_NONALNUM_RE = re.compile(r"[^A-Za-z0-9]+")
+
+_HTML_TRANS = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+# Zero-width and bidi marks dropped by normalize()
+_ZW_TRANS = dict.fromkeys([0x200b, 0x200e, 0x200f, 0x202a, 0x202b, 0x202c], None)
+
+# Already-normalized text: words separated by single spaces, no edges
+_CLEAN_RE = re.compile(r"\S+( \S+)*")
+
+
+@lru_cache(maxsize=16384)
 def normalize(s: str) -> str:
     """Remove invisible chars, normalize whitespace."""
     if not s:
         return ""
+    # Fast path: ASCII can't contain the zero-width characters, so clean
+    # ASCII strings are returned as they are
+    if s.isascii() and _CLEAN_RE.fullmatch(s):
+        return s
     # Remove zero-width characters
-    for ch in ["\u200b", "\u200e", "\u200f", "\u202a", "\u202b", "\u202c"]:
-        s = s.replace(ch, "")
+    s = s.translate(_ZW_TRANS)
     # Collapse whitespace
     s = " ".join(s.split())
     return s.strip()
 
 
+@lru_cache(maxsize=16384)
 def normalize_lower(s: str) -> str:
     """Lowercase normalized text."""
     return normalize(s).lower()
 
 
+@lru_cache(maxsize=8192)
 def html_escape(text: str) -> str:
     """Minimal HTML escaping."""
     if text is None:
         return ""
-    return (
-        text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-    )
+    return text.translate(_HTML_TRANS)
 
 
+@lru_cache(maxsize=512)
 def slugify_url(url: str) -> str:
     """
     Convert a URL into a filesystem-safe slug.
@@ -45,17 +61,8 @@ def slugify_url(url: str) -> str:
         return "page"
     url = url.strip()
     # Remove scheme
-    url = re.sub(r"^https?://", "", url)
-    # Replace non-alphanumeric sequences with underscores
-    url = re.sub(r"[^A-Za-z0-9]+", "_", url)
-    # Collapse multiple underscores
-    url = re.sub(r"_+", "_", url)
+    url = _SLUG_SCHEME_RE.sub("", url)
+    # Replace non-alphanumeric sequences (underscores included) with a
+    # single underscore, which also collapses runs of underscores
+    url = _SLUG_NONALNUM_RE.sub("_", url)
     return url.strip("_") or "page"
-
-
-def safe_get(d: dict, key, default=None):
-    """Small helper to read dictionary keys safely."""
-    try:
-        return d.get(key, default)
-    except Exception:
-        return default